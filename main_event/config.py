@@ -14,9 +14,15 @@ class Config:
     PASSES_DIR = STATIC_DIR / 'passes'
     SPONSORS_DIR = STATIC_DIR / 'sponsors'
     POWERED_BY_DIR = STATIC_DIR / 'powered_by'
+    THUMBNAILS_DIR = PASSES_DIR / 'thumbs'
     
     # Database
     DATABASE_FILE = DATA_DIR / 'passes_database.json'
+    SCAN_ARCHIVE_DIR = DATA_DIR / 'scan_archive'
+    SCAN_JOURNAL_FILE = DATA_DIR / 'scans_journal.jsonl'
+    
+    # Scan log partition size in seconds
+    SCAN_BUCKET_SECONDS = 3600
     
     # Event settings
     DEFAULT_EVENT_NAME = 'SAVORA'
@@ -27,6 +33,10 @@ class Config:
     PASS_WIDTH = 1200
     PASS_HEIGHT = 400
     
+    # Gallery thumbnail variants (name -> width in px)
+    PASS_THUMBNAIL_SIZES = {'thumb': 300, 'medium': 600}
+    PASS_THUMBNAIL_QUALITY = 80
+    
     # Powered by settings
     POWERED_BY_NAME = 'rave.live'
     POWERED_BY_LOGO = 'rave_logo.png'  # Place in static/powered_by/
@@ -36,5 +46,6 @@ class Config:
         """Initialize application directories"""
         cls.DATA_DIR.mkdir(exist_ok=True)
         cls.PASSES_DIR.mkdir(parents=True, exist_ok=True)
+        cls.THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
         cls.SPONSORS_DIR.mkdir(parents=True, exist_ok=True)
         cls.POWERED_BY_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""Asyncio scan gateway.
+
+A standalone HTTP/1.1 server for the gate-facing APIs (`POST /api/verify`
+and `GET /api/stats`) built on the same EventPassSystem as the Flask app.
+Every connection is a coroutine rather than a worker thread, so one
+process can hold thousands of persistent scanner connections.
+
+Scans are decided on the event loop, which makes check-and-admit atomic.
+A single writer task appends new scan records to a journal file and
+fsyncs it; scans that arrive while an append is in flight are
+group-committed in the next one, and a scanner only gets its answer once
+its scan is on disk. Every `compact_every` scans (and on shutdown) the
+writer folds the journal into the database file, serializing a copy of
+the data off the event loop.
+
+The gateway keeps its own in-memory copy of the database and overwrites
+the file when compacting. Do NOT run the Flask app (or a second gateway)
+against the same DATA_DIR while the gateway is live: each process would
+overwrite the other's writes, losing admitted scans and re-enabling
+double admits. Generate passes and manage sponsors with Flask before
+doors open, stop it, then start the gateway for the scanning window:
+
+    python gateway.py --port 5001
+"""
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+
+from config import Config
+from models.pass_system import EventPassSystem
+
+
+class ScanGateway:
+    """Serve scan and stats requests from an asyncio event loop"""
+
+    def __init__(self, pass_system=None, commit_window=0.005, max_batch=1000,
+                 compact_every=5000, idle_timeout=300, max_body=64 * 1024):
+        self.pass_system = pass_system or EventPassSystem()
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+        self.idle_timeout = idle_timeout
+        self.max_body = max_body
+        self._commits = None
+        self._pending = []  # scan records not yet journaled
+        self._journaled = 0  # scans journaled since the last compaction
+        self._writer_task = None
+        self._server = None
+        self._connections = {}
+
+    async def start(self, host='0.0.0.0', port=5001, backlog=4096):
+        """Start the writer task and begin accepting connections"""
+        self._commits = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        self._server = await asyncio.start_server(self._handle_connection, host, port, backlog=backlog)
+        return self._server
+
+    async def stop(self):
+        """Stop accepting connections and flush pending commits"""
+        if self._server:
+            self._server.close()
+        for writer in self._connections.values():
+            writer.close()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._writer_task:
+            await self._commits.join()
+            self._writer_task.cancel()
+            await self._compact()
+
+    # Database writes
+
+    async def _commit(self):
+        """Wait until everything recorded so far is written to disk"""
+        future = asyncio.get_running_loop().create_future()
+        self._commits.put_nowait(future)
+        await future
+
+    async def _writer(self):
+        """Single writer: batch queued commits into one journal append"""
+        db = self.pass_system.db
+        while True:
+            batch = [await self._commits.get()]
+            if self.commit_window:
+                await asyncio.sleep(self.commit_window)
+            while len(batch) < self.max_batch and not self._commits.empty():
+                batch.append(self._commits.get_nowait())
+
+            records, self._pending = self._pending, []
+            try:
+                if records:
+                    await asyncio.to_thread(db.append_journal, records)
+            except Exception as e:
+                for future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                self._journaled += len(records)
+            for _ in batch:
+                self._commits.task_done()
+
+            if self._journaled >= self.compact_every:
+                await self._compact()
+
+    async def _compact(self):
+        """Fold the journal into the database file"""
+        if not self._journaled:
+            return
+        db = self.pass_system.db
+        # Copy on the loop (cheap), serialize and write in a thread
+        view = db.snapshot_view()
+        try:
+            await asyncio.to_thread(db.compact, view)
+        except Exception as e:
+            # The journal still holds every scan; try again next time
+            print(f"Error compacting scan journal: {e}")
+        else:
+            self._journaled = 0
+
+    # Request handlers
+
+    async def verify(self, body):
+        """Verify and scan a pass"""
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"valid": False, "message": "Invalid JSON body"}
+        if not isinstance(data, dict):
+            data = {}
+        serial_number = data.get('serial_number', '')
+
+        result = self.pass_system.scan_pass(serial_number, gate=data.get('gate'), save=False)
+        if result["valid"]:
+            self._pending.append(self.pass_system.db.get_scan(serial_number))
+            try:
+                await self._commit()
+            except Exception as e:
+                # Undo the in-memory admit so the retry is not rejected as a rescan
+                print(f"Error saving scan {serial_number}: {e}")
+                self.pass_system.undo_scan(serial_number, save=False)
+                return HTTPStatus.SERVICE_UNAVAILABLE, {
+                    "valid": False,
+                    "message": "Scan not saved - please scan again",
+                    "details": None
+                }
+        return HTTPStatus.OK, result
+
+    async def stats(self, body):
+        """Get statistics"""
+        return HTTPStatus.OK, self.pass_system.get_stats()
+
+    # HTTP plumbing
+
+    def _route(self, method, path):
+        routes = {
+            ('POST', '/api/verify'): self.verify,
+            ('GET', '/api/stats'): self.stats,
+        }
+        return routes.get((method, path.split('?', 1)[0]))
+
+    async def _handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection until it closes"""
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body, error = request
+
+                if error:
+                    status, payload = error, {"success": False, "message": error.phrase}
+                else:
+                    handler = self._route(method, path)
+                    if handler is None:
+                        status, payload = HTTPStatus.NOT_FOUND, {"success": False, "message": "Not found"}
+                    else:
+                        status, payload = await handler(body)
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = not error and (connection == 'keep-alive' if version == 'HTTP/1.0'
+                                            else connection != 'close')
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Parse one request; returns None on a cleanly closed connection"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            return None, '', 'HTTP/1.1', {}, b'', HTTPStatus.BAD_REQUEST
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            return method, path, version, headers, b'', HTTPStatus.LENGTH_REQUIRED
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            return method, path, version, headers, b'', HTTPStatus.BAD_REQUEST
+        if length > self.max_body:
+            return method, path, version, headers, b'', HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        body = await reader.readexactly(length) if length else b''
+        return method, path, version, headers, body, None
+
+    @staticmethod
+    def _response(status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        return head.encode('latin-1') + body
+
+
+async def serve(host, port, commit_window):
+    gateway = ScanGateway(commit_window=commit_window)
+    server = await gateway.start(host, port)
+    try:
+        await server.serve_forever()
+    finally:
+        await gateway.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio scan gateway for the event pass system")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--commit-window', type=float, default=0.005,
+                        help="seconds to wait for more scans before each write")
+    args = parser.parse_args()
+
+    Config.init_app()
+    print("=" * 50)
+    print("Scan Gateway Starting...")
+    print("=" * 50)
+    print(f"Scanner API at: http://localhost:{args.port}/api/verify")
+    print("=" * 50)
+    try:
+        asyncio.run(serve(args.host, args.port, args.commit_window))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
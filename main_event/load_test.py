@@ -0,0 +1,407 @@
+"""Door-surge load harness.
+
+Boots the app against a synthetic database in a temporary DATA_DIR and
+drives it with concurrent scanner devices, pass generators and dashboard
+pollers over real HTTP. Everything runs in-process, no outside services.
+
+    python load_test.py --passes 3000 --devices 40 --generators 2 --pollers 4
+    python load_test.py --target gateway --devices 200
+    python load_test.py --target gateway --client asyncio --devices 3000 --think-time 1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from config import Config
+
+
+class LoadStats:
+    """Thread-safe collector for request latencies and outcomes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.admits = defaultdict(int)
+        self.rejects = defaultdict(int)
+        self.connections = 0
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def record_scan(self, serial_number, result):
+        with self.lock:
+            if result.get("valid"):
+                self.admits[serial_number] += 1
+            else:
+                self.rejects[result.get("message", "unknown")] += 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def build_synthetic_database(db_file, count):
+    """Write a database with `count` valid, unscanned passes"""
+    passes = []
+    for i in range(1, count + 1):
+        passes.append({
+            "id": i,
+            "serial_number": f"NYE2025-{i:04d}-{i:06X}",
+            "attendee_name": f"Guest {i}",
+            "ticket_type": random.choice(["General", "VIP", "Couple"]),
+            "event_name": Config.DEFAULT_EVENT_NAME,
+            "event_date": Config.DEFAULT_EVENT_DATE,
+            "venue": Config.DEFAULT_VENUE,
+            "issued_at": datetime.now().isoformat(),
+            "status": "valid"
+        })
+    data = {
+        "passes": passes,
+        "scan_log": {},
+        "sponsors": [],
+        "powered_by": {
+            "name": Config.POWERED_BY_NAME,
+            "logo": Config.POWERED_BY_LOGO
+        },
+        "next_serial": count + 1
+    }
+    with open(db_file, 'w') as f:
+        json.dump(data, f)
+    return [p["serial_number"] for p in passes]
+
+
+def use_temp_data_dir(root):
+    """Point the app's data and pass image directories at a temp root"""
+    Config.DATA_DIR = root / 'data'
+    Config.DATABASE_FILE = Config.DATA_DIR / 'passes_database.json'
+    Config.SCAN_ARCHIVE_DIR = Config.DATA_DIR / 'scan_archive'
+    Config.SCAN_JOURNAL_FILE = Config.DATA_DIR / 'scans_journal.jsonl'
+    Config.PASSES_DIR = root / 'passes'
+    Config.THUMBNAILS_DIR = Config.PASSES_DIR / 'thumbs'
+    Config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    Config.PASSES_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def start_server():
+    """Serve the Flask app on an ephemeral port in a background thread"""
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def start_gateway():
+    """Serve the asyncio scan gateway on an ephemeral port in a background thread"""
+    from gateway import ScanGateway
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    gateway = ScanGateway()
+    server = asyncio.run_coroutine_threadsafe(gateway.start('127.0.0.1', 0), loop).result()
+    port = server.sockets[0].getsockname()[1]
+
+    class Stopper:
+        def shutdown(self):
+            asyncio.run_coroutine_threadsafe(gateway.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+    return Stopper(), f"http://127.0.0.1:{port}"
+
+
+def call(stats, base_url, endpoint, method='GET', payload=None, timeout=30):
+    """Issue one request and record its latency; returns decoded JSON or None"""
+    body = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(base_url + endpoint, data=body, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            result = json.loads(resp.read())
+            ok = resp.status == 200
+    except Exception:
+        result, ok = None, False
+    stats.record(endpoint, time.perf_counter() - start, ok)
+    return result
+
+
+def scanner_device(stats, base_url, gate, arrivals, arrivals_lock, scanned, args, stop):
+    """Simulate one gate scanner pulling guests off the shared queue"""
+    rng = random.Random()
+    while not stop.is_set():
+        roll = rng.random()
+        if roll < args.invalid_rate:
+            serial = f"FAKE-{rng.randrange(10**6):06d}"
+        elif roll < args.invalid_rate + args.rescan_rate and scanned:
+            serial = rng.choice(scanned)
+        else:
+            with arrivals_lock:
+                if not arrivals:
+                    return
+                serial = arrivals.pop()
+            scanned.append(serial)
+        result = call(stats, base_url, '/api/verify', 'POST', {"serial_number": serial, "gate": gate})
+        if result is not None:
+            stats.record_scan(serial, result)
+        if args.think_time:
+            time.sleep(rng.uniform(0, args.think_time))
+
+
+class KeepAliveClient:
+    """One persistent HTTP/1.1 connection driven from an asyncio loop"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        """Send one request on the open connection; returns (status, decoded JSON)"""
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"\r\n".encode('latin-1') + body
+        )
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+            await self.connect()
+        return status, json.loads(data)
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+async def async_scanner_device(stats, client, gate, arrivals, arrivals_lock, scanned, args, stop, rng):
+    """Like scanner_device, but one coroutine on a persistent connection"""
+    while not stop.is_set():
+        roll = rng.random()
+        if roll < args.invalid_rate:
+            serial = f"FAKE-{rng.randrange(10**6):06d}"
+        elif roll < args.invalid_rate + args.rescan_rate and scanned:
+            serial = rng.choice(scanned)
+        else:
+            with arrivals_lock:
+                if not arrivals:
+                    return
+                serial = arrivals.pop()
+            scanned.append(serial)
+
+        start = time.perf_counter()
+        try:
+            status, result = await asyncio.wait_for(
+                client.request('POST', '/api/verify', {"serial_number": serial, "gate": gate}), 30)
+            ok = status == 200
+        except Exception:
+            result, ok = None, False
+            try:
+                await client.close()
+                await client.connect()
+            except OSError:
+                return
+        stats.record('/api/verify', time.perf_counter() - start, ok)
+        if result is not None and ok:
+            stats.record_scan(serial, result)
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, args.think_time))
+
+
+async def async_scanner_fleet(stats, base_url, arrivals, arrivals_lock, scanned, args, stop):
+    """Open one persistent connection per device, then scan on all of them at once"""
+    host, port = base_url.rsplit('//', 1)[1].split(':')
+    clients = [KeepAliveClient(host, int(port)) for _ in range(args.devices)]
+    await asyncio.gather(*(c.connect() for c in clients))
+    stats.connections = len(clients)
+    try:
+        await asyncio.gather(*(
+            async_scanner_device(stats, client, str(i % args.gates + 1), arrivals, arrivals_lock,
+                                 scanned, args, stop, random.Random())
+            for i, client in enumerate(clients)
+        ))
+    finally:
+        for client in clients:
+            await client.close()
+
+
+def pass_generator(stats, base_url, stop, interval):
+    """Keep issuing walk-in passes at the box office"""
+    i = 0
+    while not stop.is_set():
+        i += 1
+        call(stats, base_url, '/api/generate', 'POST', {
+            "name": f"Walk-in {threading.get_ident()}-{i}",
+            "ticketType": "General",
+            "eventName": Config.DEFAULT_EVENT_NAME,
+            "eventDate": Config.DEFAULT_EVENT_DATE,
+            "venue": Config.DEFAULT_VENUE
+        })
+        stop.wait(interval)
+
+
+def stats_poller(stats, base_url, stop, interval):
+    """Poll the dashboard stats endpoint like an open staff screen"""
+    while not stop.is_set():
+        call(stats, base_url, '/api/stats')
+        stop.wait(interval)
+
+
+def run(args):
+    """Run one surge and return the collected stats and wall time"""
+    random.seed(args.seed)
+    serials = build_synthetic_database(Config.DATABASE_FILE, args.passes)
+    random.shuffle(serials)
+    if args.target == 'gateway':
+        # The gateway has no /api/generate and must be the only DB writer
+        args.generators = 0
+        server, base_url = start_gateway()
+    else:
+        server, base_url = start_server()
+
+    stats = LoadStats()
+    stop = threading.Event()
+    arrivals, arrivals_lock, scanned = serials, threading.Lock(), []
+
+    background = [threading.Thread(target=pass_generator, args=(stats, base_url, stop, args.generate_interval))
+                  for _ in range(args.generators)]
+    background += [threading.Thread(target=stats_poller, args=(stats, base_url, stop, args.poll_interval))
+                   for _ in range(args.pollers)]
+    if args.client == 'asyncio':
+        # Every device holds one keep-alive connection, all on a single loop
+        devices = [threading.Thread(target=asyncio.run, args=(
+            async_scanner_fleet(stats, base_url, arrivals, arrivals_lock, scanned, args, stop),))]
+    else:
+        devices = [threading.Thread(target=scanner_device,
+                                    args=(stats, base_url, str(i % args.gates + 1), arrivals, arrivals_lock,
+                                          scanned, args, stop))
+                   for i in range(args.devices)]
+
+    start = time.perf_counter()
+    for t in background + devices:
+        t.daemon = True
+        t.start()
+    deadline = start + args.duration if args.duration else None
+    for t in devices:
+        t.join(None if deadline is None else max(0, deadline - time.perf_counter()))
+    stop.set()
+    elapsed = time.perf_counter() - start
+    for t in background + devices:
+        t.join()
+    server.shutdown()
+
+    return stats, elapsed
+
+
+def report(stats, elapsed, db_file):
+    """Print throughput, latency percentiles and admission integrity"""
+    print("=" * 72)
+    print(f"{'endpoint':<16}{'requests':>10}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    print("-" * 72)
+    total = 0
+    for endpoint in sorted(stats.latencies):
+        values = sorted(stats.latencies[endpoint])
+        total += len(values)
+        print(f"{endpoint:<16}{len(values):>10}{len(values) / elapsed:>10.1f}"
+              f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+              f"{percentile(values, 99) * 1000:>9.1f}{values[-1] * 1000:>9.1f}"
+              f"{stats.errors[endpoint]:>8}")
+    print("-" * 72)
+    print(f"Total: {total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+    if stats.connections:
+        print(f"Persistent scanner connections: {stats.connections}")
+
+    with open(db_file, 'r') as f:
+        recorded = defaultdict(int)
+        for records in json.load(f)["scan_log"]["partitions"].values():
+            for scan in records:
+                recorded[scan["serial_number"]] += 1
+
+    double_admits = sum(1 for n in stats.admits.values() if n > 1)
+    double_recorded = sum(1 for n in recorded.values() if n > 1)
+    print(f"Admitted: {len(stats.admits)} guests, {sum(stats.admits.values())} entry grants")
+    print(f"Double admits (responses): {double_admits}")
+    print(f"Double admits (database):  {double_recorded}")
+    lost_scans = len(set(stats.admits) - set(recorded))
+    errors = sum(stats.errors.values())
+    print(f"Lost scans (granted but not persisted): {lost_scans}")
+    print(f"HTTP errors/timeouts: {errors}")
+    for message, count in sorted(stats.rejects.items()):
+        print(f"Rejected - {message}: {count}")
+    print("=" * 72)
+    return bool(double_admits or double_recorded or lost_scans or errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Door-surge load test for the event pass app")
+    parser.add_argument('--target', choices=['flask', 'gateway'], default='flask',
+                        help="serve with the Flask app or the asyncio scan gateway")
+    parser.add_argument('--client', choices=['thread', 'asyncio'], default='thread',
+                        help="thread: one urllib request per scan; asyncio: one keep-alive connection per device")
+    parser.add_argument('--passes', type=int, default=3000, help="synthetic passes in the database")
+    parser.add_argument('--devices', type=int, default=20, help="concurrent scanner devices")
+    parser.add_argument('--gates', type=int, default=4, help="gates the devices are spread across")
+    parser.add_argument('--generators', type=int, default=1, help="concurrent /api/generate clients")
+    parser.add_argument('--generate-interval', type=float, default=1.0, help="seconds between generates")
+    parser.add_argument('--pollers', type=int, default=2, help="concurrent /api/stats pollers")
+    parser.add_argument('--poll-interval', type=float, default=0.5, help="seconds between stats polls")
+    parser.add_argument('--rescan-rate', type=float, default=0.05, help="share of scans re-presenting a used pass")
+    parser.add_argument('--invalid-rate', type=float, default=0.01, help="share of scans with an unknown serial")
+    parser.add_argument('--think-time', type=float, default=0.0, help="max seconds a device idles between scans")
+    parser.add_argument('--duration', type=float, default=0.0, help="stop after N seconds (0 = until queue empties)")
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--keep', action='store_true', help="keep the temp DATA_DIR for inspection")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix='event_load_'))
+    use_temp_data_dir(root)
+    print(f"DATA_DIR: {Config.DATA_DIR}")
+    try:
+        stats, elapsed = run(args)
+        failed = report(stats, elapsed, Config.DATABASE_FILE)
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from .pass_system import EventPassSystem
 from .database import Database
+from .scan_log import ScanLog, ScanArchiveError
 
-__all__ = ['EventPassSystem', 'Database']
\ No newline at end of file
+__all__ = ['EventPassSystem', 'Database', 'ScanLog', 'ScanArchiveError']
\ No newline at end of file
@@ -1,13 +1,21 @@
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
 from datetime import datetime
 from config import Config
+from models.scan_log import ScanLog
 
 class Database:
     """Handle all database operations"""
     
     def __init__(self):
         self.db_file = Config.DATABASE_FILE
+        self.journal_file = Config.SCAN_JOURNAL_FILE
+        # Serializes saves from concurrent Flask requests; reentrant so a
+        # method can hold it across its own _save()
+        self.lock = threading.RLock()
         self._load()
     
     def _load(self):
@@ -15,10 +23,13 @@ class Database:
         if self.db_file.exists():
             with open(self.db_file, 'r') as f:
                 self.data = json.load(f)
+            self.scan_log = ScanLog(self.data.setdefault("scan_log", {}))
+            if "scanned" in self.data:
+                self._migrate_scans()
         else:
             self.data = {
                 "passes": [],
-                "scanned": [],
+                "scan_log": {},
                 "sponsors": [],
                 "powered_by": {
                     "name": Config.POWERED_BY_NAME,
@@ -26,24 +37,137 @@ class Database:
                 },
                 "next_serial": 1  # Sequential counter
             }
+            self.scan_log = ScanLog(self.data["scan_log"])
             self._save()
+        
+        self._pass_index = {p["serial_number"]: p for p in self.data["passes"]}
+        if self.journal_file.exists():
+            self._replay_journal()
+    
+    def _replay_journal(self):
+        """Fold scans journaled since the last full save back into the database"""
+        with open(self.journal_file, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn tail from a crash mid-append
+                if self.scan_log.get(record["serial_number"]):
+                    continue
+                self.scan_log.add(record["serial_number"], gate=record.get("gate"), ts=record["ts"])
+        self._save()
+    
+    def _migrate_scans(self):
+        """Move the legacy flat scan list into the partitioned scan log"""
+        for scan in self.data.pop("scanned"):
+            ts = datetime.fromisoformat(scan["scanned_at"]).timestamp()
+            self.scan_log.add(scan["serial_number"], gate=scan.get("gate"), ts=ts)
+        self._save()
     
     def _save(self):
         """Save database to file"""
-        with open(self.db_file, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        with self.lock:
+            self.write_snapshot(self.snapshot())
+            self.clear_journal()
+    
+    def snapshot(self, data=None, indent=2):
+        """Serialize the current state (or a snapshot_view()) to JSON"""
+        return json.dumps(self.data if data is None else data, indent=indent)
+    
+    def snapshot_view(self):
+        """Copy the containers of the current state for serializing elsewhere
+        
+        Stored records are never modified once added, so copying the lists
+        and dicts that hold them is enough for a consistent snapshot.
+        """
+        scan_log = self.data["scan_log"]
+        return dict(
+            self.data,
+            passes=list(self.data["passes"]),
+            sponsors=list(self.data["sponsors"]),
+            scan_log=dict(
+                scan_log,
+                partitions={k: list(v) for k, v in scan_log["partitions"].items()},
+                archives=list(scan_log["archives"])
+            )
+        )
+    
+    def write_snapshot(self, snapshot):
+        """Durably write a serialized snapshot to the database file"""
+        # Unique temp file per write, fsync, then rename: a failed or
+        # concurrent write never truncates or clobbers the database
+        fd, tmp_path = tempfile.mkstemp(dir=self.db_file.parent, prefix=f"{self.db_file.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.db_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._fsync_dir()
+    
+    def compact(self, view):
+        """Write a snapshot_view() as the database and drop the journal"""
+        self.write_snapshot(self.snapshot(view, indent=None))
+        self.clear_journal()
+    
+    def append_journal(self, records):
+        """Durably append scan records to the journal, one JSON object per line"""
+        payload = ''.join(json.dumps(r) + '\n' for r in records).encode()
+        created = not self.journal_file.exists()
+        fd = os.open(self.journal_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+        try:
+            offset = os.lseek(fd, 0, os.SEEK_END)
+            try:
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            except OSError:
+                # Drop a partial append so scans the caller rolls back are not replayed
+                os.ftruncate(fd, offset)
+                raise
+        finally:
+            os.close(fd)
+        if created:
+            self._fsync_dir()
+    
+    def clear_journal(self):
+        """Remove the journal once a full snapshot covers its scans"""
+        try:
+            self.journal_file.unlink()
+        except FileNotFoundError:
+            pass
+    
+    def _fsync_dir(self):
+        """Persist renames and file creation in the data directory (POSIX only)"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(self.db_file.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
     
     def get_next_serial(self):
         """Get next sequential serial number"""
-        serial = self.data.get("next_serial", 1)
-        self.data["next_serial"] = serial + 1
-        self._save()
-        return serial
+        with self.lock:
+            serial = self.data.get("next_serial", 1)
+            self.data["next_serial"] = serial + 1
+            self._save()
+            return serial
     
     def add_pass(self, pass_data):
         """Add a new pass to database"""
-        self.data["passes"].append(pass_data)
-        self._save()
+        with self.lock:
+            self.data["passes"].append(pass_data)
+            self._pass_index[pass_data["serial_number"]] = pass_data
+            self._save()
     
     def get_all_passes(self):
         """Get all passes"""
@@ -51,34 +175,51 @@ class Database:
     
     def get_pass_by_serial(self, serial_number):
         """Get pass by serial number"""
-        for p in self.data["passes"]:
-            if p["serial_number"] == serial_number:
-                return p
-        return None
-    
-    def add_scan(self, serial_number):
-        """Record a pass scan"""
-        self.data["scanned"].append({
-            "serial_number": serial_number,
-            "scanned_at": datetime.now().isoformat()
-        })
-        self._save()
+        return self._pass_index.get(serial_number)
+    
+    def add_scan(self, serial_number, gate=None, save=True):
+        """Record a pass scan; save=False leaves persisting to the caller"""
+        with self.lock:
+            record = self.scan_log.add(serial_number, gate=gate)
+            if save:
+                self._save()
+            return record
+    
+    def remove_scan(self, record, save=True):
+        """Undo a recorded scan, e.g. when persisting it failed"""
+        with self.lock:
+            self.scan_log.remove(record)
+            if save:
+                self._save()
     
     def get_scan(self, serial_number):
         """Get scan record for a pass"""
-        for scan in self.data["scanned"]:
-            if scan["serial_number"] == serial_number:
-                return scan
-        return None
+        with self.lock:
+            return self.scan_log.get(serial_number)
     
     def get_all_scans(self):
         """Get all scanned passes"""
-        return self.data["scanned"]
+        with self.lock:
+            return self.scan_log.range()
+    
+    def get_scans_between(self, start=None, end=None, gate=None):
+        """Get scans with start <= timestamp < end, optionally for one gate"""
+        with self.lock:
+            return self.scan_log.range(start, end, gate)
+    
+    def archive_scans(self, before):
+        """Archive scan partitions that closed at or before `before`"""
+        with self.lock:
+            archived = self.scan_log.archive(before)
+            if archived:
+                self._save()
+            return archived
     
     def add_sponsor(self, sponsor_data):
         """Add a sponsor"""
-        self.data["sponsors"].append(sponsor_data)
-        self._save()
+        with self.lock:
+            self.data["sponsors"].append(sponsor_data)
+            self._save()
     
     def get_all_sponsors(self):
         """Get all sponsors"""
@@ -86,17 +227,19 @@ class Database:
     
     def remove_sponsor(self, sponsor_name):
         """Remove a sponsor by name"""
-        self.data["sponsors"] = [s for s in self.data["sponsors"] if s["name"] != sponsor_name]
-        self._save()
+        with self.lock:
+            self.data["sponsors"] = [s for s in self.data["sponsors"] if s["name"] != sponsor_name]
+            self._save()
     
     def update_powered_by(self, name, logo):
         """Update powered by information"""
-        self.data["powered_by"] = {
-            "name": name,
-            "logo": logo,
-            "updated_at": datetime.now().isoformat()
-        }
-        self._save()
+        with self.lock:
+            self.data["powered_by"] = {
+                "name": name,
+                "logo": logo,
+                "updated_at": datetime.now().isoformat()
+            }
+            self._save()
     
     def get_powered_by(self):
         """Get powered by information"""
@@ -107,8 +250,9 @@ class Database:
     
     def get_stats(self):
         """Get statistics"""
-        total = len(self.data["passes"])
-        scanned = len(self.data["scanned"])
+        with self.lock:
+            total = len(self.data["passes"])
+            scanned = self.scan_log.count()
         return {
             "total": total,
             "scanned": scanned,
@@ -1,6 +1,7 @@
 import hashlib
 from datetime import datetime
 from models.database import Database
+from models.scan_log import ScanArchiveError
 from utils.qr_generator import QRGenerator
 from utils.pass_designer import PassDesigner
 
@@ -75,13 +76,20 @@ class EventPassSystem:
                 "details": pass_info
             }
         
-        scan_record = self.db.get_scan(serial_number)
+        try:
+            scan_record = self.db.get_scan(serial_number)
+        except ScanArchiveError:
+            return {
+                "valid": False,
+                "message": "Scan history unavailable - check pass manually",
+                "details": pass_info
+            }
         if scan_record:
             return {
                 "valid": False,
                 "message": "Pass already scanned",
                 "details": pass_info,
-                "scanned_at": scan_record["scanned_at"]
+                "scanned_at": datetime.fromtimestamp(scan_record["ts"]).isoformat()
             }
         
         return {
@@ -90,15 +98,23 @@ class EventPassSystem:
             "details": pass_info
         }
     
-    def scan_pass(self, serial_number):
+    def scan_pass(self, serial_number, gate=None, save=True):
         """Scan and verify a pass"""
-        verification = self.verify_pass(serial_number)
-        
-        if verification["valid"]:
-            self.db.add_scan(serial_number)
+        # Check and record under one lock so two gates can't both admit
+        with self.db.lock:
+            verification = self.verify_pass(serial_number)
+            
+            if verification["valid"]:
+                self.db.add_scan(serial_number, gate=gate, save=save)
         
         return verification
     
+    def undo_scan(self, serial_number, save=True):
+        """Roll back a scan recorded by scan_pass()"""
+        scan_record = self.db.get_scan(serial_number)
+        if scan_record:
+            self.db.remove_scan(scan_record, save=save)
+    
     def get_all_passes(self):
         """Get all generated passes"""
         return self.db.get_all_passes()
@@ -107,6 +123,14 @@ class EventPassSystem:
         """Get system statistics"""
         return self.db.get_stats()
     
+    def get_scans(self, start=None, end=None, gate=None):
+        """Get scans in a time range, optionally for one gate"""
+        return self.db.get_scans_between(start, end, gate)
+    
+    def archive_scans(self, before):
+        """Archive closed scan partitions to compressed cold files"""
+        return self.db.archive_scans(before)
+    
     def add_sponsor(self, name, logo_filename):
         """Add a new sponsor"""
         sponsor_data = {
@@ -0,0 +1,199 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from config import Config
+
+class ScanArchiveError(Exception):
+    """An archived scan partition could not be read"""
+
+class ScanLog:
+    """Time-partitioned log of pass scans
+
+    Scans are kept in buckets of `bucket_seconds` keyed by bucket start
+    (epoch seconds), so range queries only touch overlapping buckets.
+    Closed buckets can be archived to gzipped JSON files to keep the
+    hot database small; archived scans stay queryable.
+
+    Archives are authoritative: if one cannot be read, lookups that need
+    it raise ScanArchiveError instead of answering as if it were empty.
+    """
+
+    def __init__(self, state, archive_dir=None):
+        # `state` lives inside the database dict and is mutated in place
+        state.setdefault("bucket_seconds", Config.SCAN_BUCKET_SECONDS)
+        state.setdefault("partitions", {})
+        state.setdefault("archives", [])
+        self.state = state
+        self.archive_dir = archive_dir or Config.SCAN_ARCHIVE_DIR
+        self._index = {}
+        for records in self.partitions.values():
+            for record in records:
+                self._index.setdefault(record["serial_number"], record)
+        self._archived_index = {}
+        self._indexed_archives = set()
+        self._archive_cache = {}
+
+    @property
+    def bucket_seconds(self):
+        return self.state["bucket_seconds"]
+
+    @property
+    def partitions(self):
+        return self.state["partitions"]
+
+    @property
+    def archives(self):
+        return self.state["archives"]
+
+    def bucket_start(self, ts):
+        """Start of the bucket containing timestamp `ts`"""
+        return int(ts // self.bucket_seconds * self.bucket_seconds)
+
+    def add(self, serial_number, gate=None, ts=None):
+        """Append a scan record and return it"""
+        record = {
+            "serial_number": serial_number,
+            "ts": ts if ts is not None else datetime.now().timestamp()
+        }
+        if gate is not None:
+            record["gate"] = str(gate)
+        self.partitions.setdefault(str(self.bucket_start(record["ts"])), []).append(record)
+        self._index.setdefault(serial_number, record)
+        return record
+
+    def remove(self, record):
+        """Remove a hot scan record previously returned by add()"""
+        records = self.partitions.get(str(self.bucket_start(record["ts"])), [])
+        for i, r in enumerate(records):
+            if r is record:
+                del records[i]
+                break
+        if not records:
+            self.partitions.pop(str(self.bucket_start(record["ts"])), None)
+        if self._index.get(record["serial_number"]) is record:
+            del self._index[record["serial_number"]]
+
+    def get(self, serial_number):
+        """Get the first scan record for a pass, hot or archived
+
+        Raises ScanArchiveError if the pass is not found and an archive
+        that might hold its scan is unreadable.
+        """
+        record = self._index.get(serial_number)
+        if record is None and self.archives:
+            unreadable = []
+            for archive in self.archives:
+                if archive["file"] in self._indexed_archives:
+                    continue
+                try:
+                    records = self._load_archive(archive)
+                except ScanArchiveError as e:
+                    unreadable.append(e)
+                    continue
+                for r in records:
+                    self._archived_index.setdefault(r["serial_number"], r)
+                self._indexed_archives.add(archive["file"])
+            record = self._archived_index.get(serial_number)
+            if record is None and unreadable:
+                # Unknown whether the pass was admitted already; never guess
+                raise unreadable[0]
+        return record
+
+    def count(self):
+        """Total number of scans, including archived ones"""
+        hot = sum(len(records) for records in self.partitions.values())
+        return hot + sum(a["count"] for a in self.archives)
+
+    def range(self, start=None, end=None, gate=None):
+        """Scans with start <= ts < end (either bound optional), oldest first"""
+        results = []
+
+        for archive in self.archives:
+            if gate is not None and gate not in archive.get("gates", {gate: 1}):
+                continue
+            if self._overlaps(archive["start"], archive["end"], start, end):
+                results.extend(self._load_archive(archive))
+
+        for key, records in self.partitions.items():
+            bucket = int(key)
+            if self._overlaps(bucket, bucket + self.bucket_seconds, start, end):
+                results.extend(records)
+
+        results = [
+            r for r in results
+            if (start is None or r["ts"] >= start)
+            and (end is None or r["ts"] < end)
+            and (gate is None or r.get("gate") == gate)
+        ]
+        results.sort(key=lambda r: r["ts"])
+        return results
+
+    def archive(self, before):
+        """Move buckets that ended at or before `before` to cold storage
+
+        Returns the manifest entries for the archived buckets.
+        """
+        closed = sorted(int(k) for k in self.partitions
+                        if int(k) + self.bucket_seconds <= before)
+        if not closed:
+            return []
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        archived = []
+        for bucket in closed:
+            records = self.partitions[str(bucket)]
+            path = self.archive_dir / f"scans_{bucket}.json.gz"
+            if path.exists():
+                # Bucket was archived before: late scans since, or a crash
+                # before the manifest was saved left these records hot too
+                with gzip.open(path, 'rt') as f:
+                    existing = json.load(f)
+                seen = {(r["serial_number"], r["ts"]) for r in existing}
+                records = existing + [r for r in records if (r["serial_number"], r["ts"]) not in seen]
+                self.state["archives"] = [a for a in self.archives if a["file"] != path.name]
+
+            # Write then rename so a crash never leaves a partial archive
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            with gzip.open(tmp_path, 'wt') as f:
+                json.dump(records, f)
+            os.replace(tmp_path, path)
+
+            gates = {}
+            for r in records:
+                if "gate" in r:
+                    gates[r["gate"]] = gates.get(r["gate"], 0) + 1
+            entry = {
+                "file": path.name,
+                "start": bucket,
+                "end": bucket + self.bucket_seconds,
+                "count": len(records),
+                "gates": gates
+            }
+            self.archives.append(entry)
+            archived.append(entry)
+            self._archive_cache[path.name] = records
+            self._indexed_archives.discard(path.name)
+
+            for record in self.partitions.pop(str(bucket)):
+                if self._index.get(record["serial_number"]) is record:
+                    del self._index[record["serial_number"]]
+
+        return archived
+
+    def _load_archive(self, archive):
+        """Records of an archived bucket, decompressed once and cached"""
+        records = self._archive_cache.get(archive["file"])
+        if records is None:
+            try:
+                with gzip.open(self.archive_dir / archive["file"], 'rt') as f:
+                    records = json.load(f)
+            except (OSError, EOFError, ValueError) as e:
+                print(f"Error reading scan archive {archive['file']}: {e}")
+                raise ScanArchiveError(f"Scan archive {archive['file']} is unreadable: {e}") from e
+            self._archive_cache[archive["file"]] = records
+        return records
+
+    @staticmethod
+    def _overlaps(lo, hi, start, end):
+        return (start is None or hi > start) and (end is None or lo < end)
\ No newline at end of file
@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify, send_file, url_for
+import math
+from datetime import datetime
 from config import Config
+from models.scan_log import ScanArchiveError
+from utils.pass_thumbnails import PassThumbnails
 
 pass_bp = Blueprint('pass', __name__, url_prefix='/api')
 
@@ -32,19 +36,88 @@ def verify_pass():
     
     data = request.json
     serial_number = data.get('serial_number', '')
-    result = pass_system.scan_pass(serial_number)
+    result = pass_system.scan_pass(serial_number, gate=data.get('gate'))
     return jsonify(result)
 
+def _parse_time(value):
+    """Parse epoch seconds or an ISO 8601 string; None passes through
+
+    Raises ValueError for anything else, including NaN and infinities.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"Invalid time: {value!r}")
+    try:
+        ts = float(value)
+    except ValueError:
+        ts = datetime.fromisoformat(value).timestamp()
+    if not math.isfinite(ts):
+        raise ValueError(f"Invalid time: {value!r}")
+    return ts
+
+@pass_bp.route('/scans', methods=['GET'])
+def get_scans():
+    """Get scans in a time range, e.g. ?start=2025-12-31T22:00&end=2025-12-31T23:00&gate=3"""
+    from app import pass_system
+    
+    try:
+        start = _parse_time(request.args.get('start'))
+        end = _parse_time(request.args.get('end'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    try:
+        scans = pass_system.get_scans(start, end, request.args.get('gate'))
+    except ScanArchiveError as e:
+        return jsonify({"success": False, "message": str(e)}), 503
+    
+    scans = [dict(scan, scanned_at=datetime.fromtimestamp(scan['ts']).isoformat()) for scan in scans]
+    
+    return jsonify({
+        "success": True,
+        "scans": scans,
+        "total": len(scans)
+    })
+
+@pass_bp.route('/scans/archive', methods=['POST'])
+def archive_scans():
+    """Archive scan partitions that closed before a cutoff (default: now)"""
+    from app import pass_system
+    
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Expected a JSON object"}), 400
+    try:
+        before = _parse_time(data.get('before'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if before is None:
+        before = datetime.now().timestamp()
+    
+    archived = pass_system.archive_scans(before)
+    return jsonify({
+        "success": True,
+        "archived": archived,
+        "scans": sum(a['count'] for a in archived)
+    })
+
 @pass_bp.route('/passes', methods=['GET'])
 def get_all_passes():
     """Get all generated passes"""
     from app import pass_system
     
-    passes = pass_system.get_all_passes()
+    size = request.args.get('size')
+    if size and not PassThumbnails.is_valid_size(size):
+        return jsonify({"success": False, "message": f"Unknown size: {size}"}), 400
     
-    # Add URLs to passes
-    for p in passes:
-        p['pass_url'] = url_for('static', filename=f'passes/{p["serial_number"]}.png', _external=True)
+    # Add URLs to copies so they never end up in the stored pass records
+    passes = []
+    for p in pass_system.get_all_passes():
+        p = dict(p, pass_url=url_for('static', filename=f'passes/{p["serial_number"]}.png', _external=True))
+        if size:
+            p['image_url'] = url_for('pass.pass_image', serial=p['serial_number'], size=size, _external=True)
+        passes.append(p)
     
     return jsonify({
         "success": True,
@@ -52,6 +125,24 @@ def get_all_passes():
         "total": len(passes)
     })
 
+@pass_bp.route('/pass-image/<serial>')
+def pass_image(serial):
+    """Serve a pass image variant, e.g. ?size=thumb; renders it on first request"""
+    size = request.args.get('size', PassThumbnails.FULL)
+    if not PassThumbnails.is_valid_size(size):
+        return jsonify({"success": False, "message": f"Unknown size: {size}"}), 400
+    
+    if size == PassThumbnails.FULL:
+        filepath = Config.PASSES_DIR / f"{serial}.png"
+        if not filepath.exists():
+            return jsonify({"success": False, "message": "Pass not found"}), 404
+        return send_file(filepath, max_age=86400)
+    
+    filepath = PassThumbnails.get(serial, size)
+    if filepath is None:
+        return jsonify({"success": False, "message": "Pass not found"}), 404
+    return send_file(filepath, max_age=86400)
+
 @pass_bp.route('/download/<serial>')
 def download_pass(serial):
     """Download a pass"""
@@ -1,4 +1,5 @@
 from .qr_generator import QRGenerator
 from .pass_designer import PassDesigner
+from .pass_thumbnails import PassThumbnails
 
-__all__ = ['QRGenerator', 'PassDesigner']
\ No newline at end of file
+__all__ = ['QRGenerator', 'PassDesigner', 'PassThumbnails']
\ No newline at end of file
@@ -1,5 +1,6 @@
 from PIL import Image, ImageDraw, ImageFont
 from config import Config
+from utils.pass_thumbnails import PassThumbnails
 
 class PassDesigner:
     """Create visual pass designs"""
@@ -32,6 +33,9 @@ class PassDesigner:
         filepath = Config.PASSES_DIR / filename
         img.save(filepath, quality=95)
         
+        # Gallery thumbnails from the in-memory image, no re-decode
+        PassThumbnails.create_all(img, pass_data['serial_number'])
+        
         return filename
     
     def _load_fonts(self):
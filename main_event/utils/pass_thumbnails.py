@@ -0,0 +1,76 @@
+import os
+import threading
+from PIL import Image
+from config import Config
+
+class PassThumbnails:
+    """Downscaled variants of rendered pass images, cached on disk"""
+
+    # Size name for the original rendered PNG
+    FULL = 'full'
+
+    @classmethod
+    def is_valid_size(cls, size):
+        """Whether `size` names a thumbnail variant or the full image"""
+        return size == cls.FULL or size in cls.sizes()
+
+    @staticmethod
+    def sizes():
+        """Named thumbnail sizes mapped to their pixel width"""
+        return Config.PASS_THUMBNAIL_SIZES
+
+    @staticmethod
+    def path_for(serial_number, size):
+        """Cache path of one variant"""
+        return Config.THUMBNAILS_DIR / size / f"{serial_number}.jpg"
+
+    @classmethod
+    def create_all(cls, img, serial_number):
+        """Create every variant from an already rendered pass image"""
+        for size in cls.sizes():
+            cls._save_variant(img, serial_number, size)
+
+    @classmethod
+    def get(cls, serial_number, size):
+        """Path to a variant, rendering it from the full pass on first request
+
+        Returns None if the full-size pass image does not exist.
+        """
+        source = Config.PASSES_DIR / f"{serial_number}.png"
+        if not source.exists():
+            return None
+
+        path = cls.path_for(serial_number, size)
+        if path.exists() and path.stat().st_mtime >= source.stat().st_mtime:
+            return path
+
+        with Image.open(source) as img:
+            img.load()
+            return cls._save_variant(img, serial_number, size)
+
+    @classmethod
+    def _save_variant(cls, img, serial_number, size):
+        width = cls.sizes()[size]
+        thumb = cls._downscale(img.convert('RGB'), width)
+
+        path = cls.path_for(serial_number, size)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename so concurrent requests never serve a partial file
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        thumb.save(tmp_path, 'JPEG', quality=Config.PASS_THUMBNAIL_QUALITY, optimize=True)
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def _downscale(img, width):
+        """Box-reduce by the integer factor, then finish with a small resample"""
+        if img.width <= width:
+            return img
+        height = round(img.height * width / img.width)
+        factor = img.width // width
+        if factor > 1:
+            img = img.reduce(factor)
+        if img.size != (width, height):
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+        return img
\ No newline at end of file